@@ -7,6 +7,8 @@
 
 """Module init code."""
 
+from typing import Any
+
 __all__ = [
     "DpdApiClient",
     "Scan",
@@ -20,7 +22,6 @@ __all__ = [
 ]
 
 from .dpd_api_client import DpdApiClient
-from .metadata_builder import MetaDataBuilder
 from .scan import Scan
 from .scan_manager import ScanManager
 from .scan_transfer import ScanTransfer
@@ -28,3 +29,12 @@ from .scan_process import ScanProcess
 from .sdp_transfer import SdpTransfer
 from .voltage_recorder_scan import VoltageRecorderScan
 from .voltage_recorder_file import VoltageRecorderFile
+
+
+def __getattr__(name: str) -> Any:
+    """Lazily import MetaDataBuilder, so that importing the package does not import astropy."""
+    if name == "MetaDataBuilder":
+        from .metadata_builder import MetaDataBuilder
+
+        return MetaDataBuilder
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
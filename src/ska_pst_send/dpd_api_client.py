@@ -24,13 +24,17 @@ class DpdApiClient:
         self: DpdApiClient,
         endpoint: str,
         logger: logging.Logger | None = None,
+        session: requests.Session | None = None,
     ) -> None:
         """Initialize the DpdApiClient with API endpoint.
 
         :param endpoint: The endpoint of the API server. Consists of domain name and port number
         :param logger: the logger instance to use.
+        :param session: the HTTP session used for all API calls, so that connections to the
+            API server are reused. A new session is created if one is not given.
         """
         self._endpoint = endpoint
+        self._session = session or requests.Session()
         self._api_reindex_dataproducts = API_REINDEX_DATA_PRODUCTS
         self._api_dataproductlist = API_DATA_PRODUCT_LIST
         self._api_search_term = API_SEARCH_TERM
@@ -43,7 +47,7 @@ class DpdApiClient:
         """
         self.logger.debug("Calling DPD reindex dataproducts API")
         url = f"{self._endpoint}/{self._api_reindex_dataproducts}"
-        response = requests.get(url, headers={"accept": "application/json"})
+        response = self._session.get(url, headers={"accept": "application/json"})
         if response.ok:
             self.logger.debug(
                 f"DPD reindex dataproducts API successful return code. response={response.json()}"
@@ -62,7 +66,7 @@ class DpdApiClient:
             bool: True if metadata exists, False otherwise.
         """
         url = f"{self._endpoint}/{self._api_dataproductlist}"
-        response = requests.get(url, headers={"accept": "application/json"})
+        response = self._session.get(url, headers={"accept": "application/json"})
         if response.ok:
             # Parse the JSON response into a list of dictionaries
             metadata_list = response.json()
@@ -46,6 +46,8 @@ class ScanProcess(threading.Thread):
         self.loop_wait = loop_wait
         self.minimum_age = minimum_age
         self.completed = False
+        # set when the run method returns, however the processing of the scan ended
+        self.finished = threading.Event()
 
     def _handle_scan_potentially_complete(self: ScanProcess) -> None:
         self.logger.debug(f"checking if scan {self.scan.scan_id} is actually complete.")
@@ -83,6 +85,8 @@ class ScanProcess(threading.Thread):
         except Exception:
             self.logger.exception(f"{self} thread received an exception. Exiting loop.", exc_info=True)
             self.scan.processing_failed = True
+        finally:
+            self.finished.set()
 
     def __repr__(self: ScanProcess) -> str:
         """Get string representation for scan process."""
@@ -30,6 +30,7 @@ class ScanTransfer(threading.Thread):
         remote_scan: VoltageRecorderScan,
         exit_cond: threading.Condition,
         loop_wait: float = 2,
+        file_wait: float = 0.1,
         dir_perms: int = 0o777,
         minimum_age: float = 10,
         logger: logging.Logger | None = None,
@@ -41,6 +42,7 @@ class ScanTransfer(threading.Thread):
         :param remote_scan: scan to which the local scan will be transferred.
         :param exit_cond: condition variable to use to trigger thread termination.
         :param loop_wait: timeout for the main processing loop.
+        :param file_wait: timeout to wait on the exit condition before transferring each file.
         :param dir_perms: octal permissions to apply when creating directories during transfer.
         :param minimum_age: minimum age to require for untransferred files, in seconds.
         :param logger: the logger instance to use.
@@ -52,6 +54,7 @@ class ScanTransfer(threading.Thread):
         self.exit_cond = exit_cond
         self.logger = logger or logging.getLogger(__name__)
         self.loop_wait = loop_wait
+        self.file_wait = file_wait
         self.default_dir_perms = dir_perms
         self.minimum_age = minimum_age
         self.completed = False
@@ -65,17 +68,16 @@ class ScanTransfer(threading.Thread):
         :return: the list of voltage recorder files
         :rtype: List[VoltageRecorderFile].
         """
-        # update the local and remote scan file lists
-        self.local_scan.update_files()
-        self.remote_scan.update_files()
-
-        local_files = self.local_scan.get_all_files()
+        # only the remote files need to be materialised, as they are searched for each local file
         remote_files = self.remote_scan.get_all_files()
-        self.logger.debug(f"local_files count={len(local_files)}")
         self.logger.debug(f"remote_files count={len(remote_files)}")
 
         # build the list of untransferred files
-        files = [local for local in local_files if local not in remote_files and local.age >= minimum_age]
+        files = [
+            local
+            for local in self.local_scan.iter_all_files()
+            if local not in remote_files and local.age >= minimum_age
+        ]
         self.logger.debug(f"files count={len(files)}")
 
         return sorted(files)
@@ -89,7 +91,7 @@ class ScanTransfer(threading.Thread):
 
             # check for the exit condition, with a small timeout
             with self.exit_cond:
-                if self.exit_cond.wait(timeout=0.1):
+                if self.exit_cond.wait(timeout=self.file_wait):
                     self.logger.debug("ScanTransfer thread exiting on command")
                     return False
 
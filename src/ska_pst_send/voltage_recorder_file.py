@@ -8,6 +8,7 @@
 """Module class for data, weights and stats files of the PST Voltage Recorder."""
 from __future__ import annotations
 
+import functools
 import os
 import pathlib
 import time
@@ -20,16 +21,25 @@ _all__ = [
 class VoltageRecorderFile:
     """Provides representation for PST voltage recorder data and control files."""
 
-    def __init__(self: VoltageRecorderFile, file_name: pathlib.Path, data_product_path: pathlib.Path):
+    def __init__(
+        self: VoltageRecorderFile,
+        file_name: pathlib.Path | str,
+        data_product_path: pathlib.Path,
+        dir_entry: os.DirEntry[str] | None = None,
+    ):
         """
         Initialise the VoltageRecorderFile object.
 
         :param file_name: absolute path name of the file
         :param data_product_path: absolute path of the data product directory
+        :param dir_entry: optional directory entry for the file, as returned by os.scandir,
+            whose cached status is used instead of querying the file system again
         """
-        self.file_name = file_name
+        self.file_name = pathlib.Path(file_name)
         self.data_product_path = data_product_path
-        self._file_number: int | None = None
+        self._dir_entry = dir_entry
+        self._stat_result: os.stat_result | None = None
+        self._path = dir_entry.path if dir_entry is not None else os.fspath(file_name)
 
     def __str__(self: VoltageRecorderFile) -> str:
         """
@@ -55,6 +65,15 @@ class VoltageRecorderFile:
             f"relative_path={self.relative_path})"
         )
 
+    def __fspath__(self: VoltageRecorderFile) -> str:
+        """
+        Return the file system path of the file.
+
+        :return: the file_name as a string
+        :rtype: str
+        """
+        return self._path
+
     def __eq__(self: VoltageRecorderFile, other: object | None) -> bool:
         """
         Return the equality between two VoltageRecorderFile objects.
@@ -88,9 +107,10 @@ class VoltageRecorderFile:
         :return: age of the file in seconds
         :rtype: int
         """
-        if not self.exists():
+        try:
+            return time.time() - self.stat().st_mtime
+        except FileNotFoundError:
             return -1
-        return time.time() - os.path.getmtime(self.file_name)
 
     def exists(self: VoltageRecorderFile) -> bool:
         """
@@ -99,7 +119,33 @@ class VoltageRecorderFile:
         :return: flag indicating the file_name exists on the file system.
         :rtype: bool
         """
-        return self.file_name.exists()
+        try:
+            self.stat()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def refresh(self: VoltageRecorderFile) -> None:
+        """Discard any cached status of the file, so that it is next read from the file system."""
+        self._dir_entry = None
+        self._stat_result = None
+
+    def stat(self: VoltageRecorderFile) -> os.stat_result:
+        """
+        Return the status of the file.
+
+        The status is read at most once between calls to :py:meth:`refresh`. If the file was found
+        by a directory scan, the status cached on its directory entry is used.
+
+        :return: the status of the file_name.
+        :rtype: os.stat_result
+        """
+        if self._stat_result is None:
+            if self._dir_entry is not None:
+                self._stat_result = self._dir_entry.stat()
+            else:
+                self._stat_result = self.file_name.stat()
+        return self._stat_result
 
     @property
     def file_size(self: VoltageRecorderFile) -> int:
@@ -109,21 +155,24 @@ class VoltageRecorderFile:
         :return: size of the file_name in bytes.
         :rtype: int
         """
-        if self.exists():
-            return self.file_name.stat().st_size
-        return 0
+        try:
+            return self.stat().st_size
+        except FileNotFoundError:
+            return 0
 
-    @property
+    @functools.cached_property
     def relative_path(self: VoltageRecorderFile) -> pathlib.Path:
         """
         The relative path to the data_product_path.
 
+        The path is only computed once, as it is used for every comparison of files.
+
         :return: relative path to the data_product_path
         :rtype: pathlib.Path
         """
         return self.file_name.relative_to(self.data_product_path)
 
-    @property
+    @functools.cached_property
     def file_number(self: VoltageRecorderFile) -> int:
         """
         The file number of the voltage recorder file, or 0 in not applicable.
@@ -132,13 +181,10 @@ class VoltageRecorderFile:
         :return: file number or rank
         :rtype: int
         """
-        if self._file_number is None:
-            parts = str(self.file_name.stem).split("_")
-            if len(parts) == 3:
-                try:
-                    self._file_number = int(parts[2])
-                except ValueError:
-                    self._file_number = 0
-            else:
-                self._file_number = 0
-        return self._file_number
+        parts = str(self.file_name.stem).split("_")
+        if len(parts) == 3:
+            try:
+                return int(parts[2])
+            except ValueError:
+                return 0
+        return 0
@@ -8,13 +8,17 @@
 """Module class for managing scans of recorded by the PST AA0.5 Voltage Recorder."""
 from __future__ import annotations
 
+import concurrent.futures
+import itertools
 import logging
+import operator
+import os
 import pathlib
 import subprocess
+import threading
 import time
-from typing import Any, List, Tuple
+from typing import Any, Dict, Iterator, List, Set, Tuple
 
-from .metadata_builder import MetaDataBuilder
 from .scan import Scan
 from .voltage_recorder_file import VoltageRecorderFile
 
@@ -24,6 +28,14 @@ __all__ = [
 
 NANOSECONDS_PER_SEC = 1e9
 
+# file name suffixes of the data and weights files and of the stat files generated from them
+DADA_FILE_SUFFIX = ".dada"
+STAT_FILE_SUFFIX = ".h5"
+
+# a directory listing is only reused if the directory was last modified at least this long
+# before it was scanned, so that entries added within the same timestamp tick are not missed.
+DIRECTORY_MTIME_MARGIN_NS = int(NANOSECONDS_PER_SEC)
+
 
 class VoltageRecorderScan(Scan):
     """Class representing PST Voltage Recoder Data Products for a Scan."""
@@ -42,11 +54,19 @@ class VoltageRecorderScan(Scan):
         """
         Scan.__init__(self, data_product_path, relative_scan_path, logger)
 
+        self._stat_dir_str = os.path.join(self.full_scan_path, "stat")
+
         self._data_files: List[VoltageRecorderFile] = []
         self._weights_files: List[VoltageRecorderFile] = []
         self._stats_files: List[VoltageRecorderFile] = []
         self._config_files: List[VoltageRecorderFile] = []
-        self._unprocessable_files: List[pathlib.Path] = []
+        self._all_files_cache: Tuple[VoltageRecorderFile, ...] = ()
+        self._weights_index: Dict[int, VoltageRecorderFile] = {}
+        self._stats_stems: Set[str] = set()
+        self._processed_count = 0
+        self._unprocessable_files: Set[str] = set()
+        self._unprocessable_files_lock = threading.Lock()
+        self._dir_mtimes: Dict[str, int] = {}
 
         # create time of scan is creation time of scan directory
         created_time_ns = self.full_scan_path.stat().st_ctime_ns
@@ -81,32 +101,54 @@ class VoltageRecorderScan(Scan):
         )
         self._modified_time_ns = curr_time_ns
 
-    def update_files(self: VoltageRecorderScan) -> None:
-        """Check the file system for new data, weights and stats files."""
-        self._data_files = [
-            VoltageRecorderFile(data_file, self.data_product_path)
-            for data_file in sorted(self.full_scan_path.glob("data/*.dada"))
-        ]
+    def update_files(self: VoltageRecorderScan, force: bool = False) -> None:
+        """Check the file system for new data, weights and stats files.
 
-        self._weights_files = [
-            VoltageRecorderFile(weights_file, self.data_product_path)
-            for weights_file in sorted(self.full_scan_path.glob("weights/*.dada"))
-        ]
+        The data, weights and stat directories are only re-read if their modification time has
+        changed since they were last scanned.
 
-        self._stats_files = [
-            VoltageRecorderFile(stats_file, self.data_product_path)
-            for stats_file in sorted(self.full_scan_path.glob("stat/*.h5"))
-        ]
-
-        self._config_files = []
-        if self.data_product_file_exists():
-            self._config_files.append(VoltageRecorderFile(self._data_product_file, self.data_product_path))
-        if self.scan_config_file_exists():
-            self._config_files.append(VoltageRecorderFile(self._scan_config_file, self.data_product_path))
+        :param force: re-read all directories, even if they appear unchanged, defaults to False
+        """
+        if force:
+            self._invalidate_listing()
+
+        previous_files = (self._data_files, self._weights_files, self._stats_files, self._config_files)
+
+        subdirs = self._list_subdirectories()
+        self._data_files = self._scan_suffix(subdirs, "data", DADA_FILE_SUFFIX, self._data_files)
+        self._weights_files = self._scan_suffix(subdirs, "weights", DADA_FILE_SUFFIX, self._weights_files)
+        self._stats_files = self._scan_suffix(subdirs, "stat", STAT_FILE_SUFFIX, self._stats_files)
+
+        config_file_names = [f for f in [self._data_product_file, self._scan_config_file] if f.exists()]
+        if config_file_names != [f.file_name for f in self._config_files]:
+            self._config_files = [VoltageRecorderFile(f, self.data_product_path) for f in config_file_names]
+        else:
+            for f in self._config_files:
+                f.refresh()
+
+        # only rebuild the derived lookups if any of the lists of files have been rebuilt
+        current_files = (self._data_files, self._weights_files, self._stats_files, self._config_files)
+        if any(previous is not current for (previous, current) in zip(previous_files, current_files)):
+            self._weights_index = {w.file_number: w for w in self._weights_files}
+            self._stats_stems = {f.file_name.stem for f in self._stats_files}
+            # the leading data files that already have stat files are skipped when searching for
+            # unprocessed files, so repeated searches of an unchanged scan do not re-check them
+            self._processed_count = sum(
+                1
+                for _ in itertools.takewhile(
+                    lambda d: d.file_name.stem in self._stats_stems, self._data_files
+                )
+            )
+            self._all_files_cache = (
+                *self._data_files,
+                *self._weights_files,
+                *self._stats_files,
+                *self._config_files,
+            )
 
         def _update_last_modified_time(files: List[VoltageRecorderFile]) -> None:
             for f in files:
-                file_modified_time_ns = f.file_name.stat().st_mtime_ns
+                file_modified_time_ns = f.stat().st_mtime_ns
                 if file_modified_time_ns > self._modified_time_ns:
                     self.logger.debug(
                         f"file {f} has modified file more recent than scan's modified time. "
@@ -122,64 +164,144 @@ class VoltageRecorderScan(Scan):
         ]:
             _update_last_modified_time(files)
 
+    def _list_subdirectories(self: VoltageRecorderScan) -> Dict[str, os.DirEntry[str]]:
+        """Return the directory entries of the sub-directories of the scan, keyed by name."""
+        try:
+            with os.scandir(self.full_scan_path) as it:
+                return {e.name: e for e in it if e.is_dir()}
+        except FileNotFoundError:
+            return {}
+
+    def _invalidate_listing(self: VoltageRecorderScan, name: str | None = None) -> None:
+        """Forget the listing of sub-directories, so that they are re-read by the next update of the files.
+
+        :param name: the name of the sub-directory to forget, defaults to all of the sub-directories
+        """
+        if name is None:
+            self._dir_mtimes.clear()
+        else:
+            self._dir_mtimes.pop(name, None)
+
+    def _scan_suffix(
+        self: VoltageRecorderScan,
+        subdirs: Dict[str, os.DirEntry[str]],
+        name: str,
+        suffix: str,
+        current_files: List[VoltageRecorderFile],
+    ) -> List[VoltageRecorderFile]:
+        """Return the files in a sub-directory with the given suffix, sorted by file name.
+
+        File names are matched with a literal suffix comparison rather than a glob pattern.
+        """
+        try:
+            directory = subdirs[name]
+            dir_mtime_ns = directory.stat().st_mtime_ns
+        except (KeyError, FileNotFoundError):
+            self._dir_mtimes.pop(name, None)
+            # keep an existing empty list, so that the caller can detect that nothing has changed
+            return current_files if len(current_files) == 0 else []
+
+        if current_files and self._dir_mtimes.get(name) == dir_mtime_ns:
+            # no entries added or removed, only the status of the files may have changed
+            for f in current_files:
+                f.refresh()
+            return current_files
+
+        scan_time_ns = time.time_ns()
+        try:
+            with os.scandir(directory.path) as it:
+                entries = [e for e in it if e.name.endswith(suffix) and e.is_file()]
+        except FileNotFoundError:
+            self._dir_mtimes.pop(name, None)
+            return []
+
+        if dir_mtime_ns < scan_time_ns - DIRECTORY_MTIME_MARGIN_NS:
+            self._dir_mtimes[name] = dir_mtime_ns
+        else:
+            self._dir_mtimes.pop(name, None)
+
+        # the file names have zero padded timestamps and file numbers, so sorting the names
+        # lexically also sorts the files chronologically
+        entries.sort(key=operator.attrgetter("name"))
+        return [
+            VoltageRecorderFile(pathlib.Path(e.path), self.data_product_path, dir_entry=e) for e in entries
+        ]
+
     def generate_data_product_file(self: VoltageRecorderScan) -> None:
         """Generate the ska-data-product.yaml file."""
         # ensure the scan is marked as completed
         assert self.is_complete(), "generate_data_product_file called when scan is not complete"
-        unprocessed_file = self.next_unprocessed_file(minimum_age=0)
+        # the caller has just refreshed the file listing, no need to scan the file system again
+        unprocessed_file = self.next_unprocessed_file(minimum_age=0, refresh=False)
         assert (
             unprocessed_file is None
         ), f"generate_data_product_file called when there are unprocessed files. {unprocessed_file}"
 
+        # only import the metadata builder, and its astropy dependency, when it is needed
+        from .metadata_builder import MetaDataBuilder
+
         metadata_builder = MetaDataBuilder(dsp_mount_path=self.full_scan_path)
         metadata_builder.generate_metadata()
 
     def _data_and_weights_file_pairs(
         self: VoltageRecorderScan,
-    ) -> List[Tuple[VoltageRecorderFile, VoltageRecorderFile]]:
-        return [
-            (d, w) for d in self._data_files for w in self._weights_files if d.file_number == w.file_number
-        ]
+    ) -> Iterator[Tuple[VoltageRecorderFile, VoltageRecorderFile]]:
+        # lazily generate the pairs, as callers usually stop at the first unprocessed pair
+        data_files = self._data_files
+        for idx in range(self._processed_count, len(data_files)):
+            d = data_files[idx]
+            if d.file_number in self._weights_index:
+                yield (d, self._weights_index[d.file_number])
+
+    def _unprocessed_files(
+        self: VoltageRecorderScan,
+        minimum_age: float,
+    ) -> Iterator[Tuple[VoltageRecorderFile, VoltageRecorderFile, VoltageRecorderFile]]:
+        # combine the data and weights files into a enumerated tuple and iterate
+        for (data_file, weights_file) in self._data_and_weights_file_pairs():
+            # if the stat file already exists, then no need to generate
+            stem = data_file.file_name.stem
+            if stem in self._stats_stems:
+                continue
+
+            # the stat file that should exist, only converted to a path if it is to be processed
+            stat_file_name = os.path.join(self._stat_dir_str, stem + STAT_FILE_SUFFIX)
+
+            # stat file cannot be generated due to a previous processing failure
+            if stat_file_name in self._unprocessable_files:
+                self.logger.debug(
+                    f"{self} skipping {os.path.relpath(stat_file_name, self.data_product_path)} "
+                    "as it has been marked as unprocessable"
+                )
+                continue
+
+            # input data and weights files must be at least minimum age, only check the
+            # weights file if the data file is old enough
+            if data_file.age < minimum_age or weights_file.age < minimum_age:
+                continue
+
+            self.logger.debug(
+                f"{self} has unprocessed pair of files. data_file={data_file} weights_file={weights_file}"
+            )
+            yield (data_file, weights_file, VoltageRecorderFile(stat_file_name, self.data_product_path))
 
     def next_unprocessed_file(
         self: VoltageRecorderScan,
         minimum_age: float = 10,
+        refresh: bool = True,
     ) -> Tuple[VoltageRecorderFile, VoltageRecorderFile, VoltageRecorderFile] | None:
         """
         Return a data and weights file that have not yet been processed into a stat file.
 
         :param minimum_age: minimum allowed age, the number of seconds since last modification
+        :param refresh: check the file system for new files before searching, defaults to True
         :return: tuple of voltage recorder files to be processed
         :rtype: Tuple[VoltageRecorderFile, VoltageRecorderFile, VoltageRecorderFile]
         """
-        self.update_files()
-
-        # combine the data and weights files into a enumerated tuple and iterate
-        for (data_file, weights_file) in self._data_and_weights_file_pairs():
-            # the stat file that should exist
-            stat_file = VoltageRecorderFile(
-                self.full_scan_path / "stat" / f"{data_file.file_name.stem}.h5", self.data_product_path
-            )
-
-            # stat file cannot be generated due to a previous processing failure
-            if stat_file.file_name in self._unprocessable_files:
-                self.logger.debug(
-                    f"{self} skipping {stat_file.relative_path} as it has been marked as unprocessable"
-                )
-                continue
-
-            # if the stat file already exists, then no need to generate
-            if stat_file.exists():
-                continue
-
-            # input data and weights files must be at least minimum age
-            if min(data_file.age, weights_file.age) >= minimum_age:
-                self.logger.debug(
-                    f"{self} has unprocessed pair of files. data_file={data_file} weights_file={weights_file}"
-                )
-                return (data_file, weights_file, stat_file)
+        if refresh:
+            self.update_files()
 
-        return None
+        return next(self._unprocessed_files(minimum_age), None)
 
     def process_next_unprocessed_file(self: VoltageRecorderScan, minimum_age: float = 10.0) -> None:
         """Process the next unprocessed file if one exists.
@@ -193,6 +315,34 @@ class VoltageRecorderScan(Scan):
         if unprocessed_file is not None:
             self.process_file(unprocessed_file)
 
+    def process_all_unprocessed(
+        self: VoltageRecorderScan,
+        minimum_age: float = 10.0,
+        max_workers: int | None = None,
+        batch_size: int = 32,
+    ) -> bool:
+        """Process a batch of unprocessed files concurrently.
+
+        Each file is processed by an external command, so the files are processed in parallel
+        by a pool of threads.
+
+        :param minimum_age: minimum allowed age, the number of seconds since last modification
+        :param max_workers: maximum number of files to process at once, defaults to the number of CPUs
+        :param batch_size: maximum number of files to process, defaults to 32
+        :return: flag indicating all of the files were processed successfully
+        :rtype: bool
+        """
+        self.update_files()
+        unprocessed_files = list(itertools.islice(self._unprocessed_files(minimum_age), batch_size))
+        self.logger.debug(f"{self} processing batch of {len(unprocessed_files)} unprocessed files")
+        if len(unprocessed_files) == 0:
+            return True
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            results = list(executor.map(self.process_file, unprocessed_files))
+
+        return all(results)
+
     def process_file(
         self: VoltageRecorderScan,
         unprocessed_file: Tuple[VoltageRecorderFile, VoltageRecorderFile, VoltageRecorderFile],
@@ -217,9 +367,9 @@ class VoltageRecorderScan(Scan):
         command = [
             "ska_pst_stat_file_proc",
             "-d",
-            str(data_file.file_name),
+            os.fspath(data_file),
             "-w",
-            str(weights_file.file_name),
+            os.fspath(weights_file),
         ]
 
         self.logger.info(f"Processing files {data_file.file_name.name}, {weights_file.file_name.name}")
@@ -231,27 +381,45 @@ class VoltageRecorderScan(Scan):
             cwd=self.full_scan_path,
             shell=False,
             stdin=None,
-            capture_output=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
         )
 
         ok = completed.returncode == 0
         if not ok:
-            self.logger.warning(f"command {command} failed: {completed.returncode}")
+            stderr = completed.stderr.decode(errors="replace").strip() if completed.stderr else ""
+            self.logger.warning(f"command {command} failed: {completed.returncode} stderr={stderr}")
             self.logger.debug(f"marking {stats_file.file_name} as unprocessable file")
-            self._unprocessable_files.append(stats_file.file_name)
+            with self._unprocessable_files_lock:
+                self._unprocessable_files.add(os.fspath(stats_file))
+
+        # the command writes the stat file, do not rely on the modification time of the directory
+        self._invalidate_listing("stat")
 
         self.update_modified_time()
         return ok
 
-    def get_all_files(self: VoltageRecorderScan) -> List[VoltageRecorderFile]:
+    def get_all_files(self: VoltageRecorderScan) -> Tuple[VoltageRecorderFile, ...]:
+        """
+        Return a tuple of all data, weights, stats and control files.
+
+        The tuple is only rebuilt when the files of the scan have changed.
+
+        :return: tuple of all pertitent files for a scan
+        :rtype: Tuple[VoltageRecorderFile, ...]
+        """
+        self.update_files()
+        return self._all_files_cache
+
+    def iter_all_files(self: VoltageRecorderScan) -> Iterator[VoltageRecorderFile]:
         """
-        Return a list of all data, weights, stats and control files.
+        Iterate over all data, weights, stats and control files.
 
-        :return: list of all pertitent files for a scan
-        :rtype: List[VoltageRecorderFile]
+        :return: iterator over all pertitent files for a scan
+        :rtype: Iterator[VoltageRecorderFile]
         """
         self.update_files()
-        return [*self._data_files, *self._weights_files, *self._stats_files, *self._config_files]
+        yield from self._all_files_cache
 
     def __repr__(self: VoltageRecorderScan) -> str:
         """Get string representation of current VoltageRecorderScan."""
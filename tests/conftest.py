@@ -7,21 +7,75 @@
 
 """This module defines elements of the pytest test harness shared by all tests."""
 
+from __future__ import annotations
+
+import concurrent.futures
+import itertools
 import logging
+import os
 import pathlib
 import random
 import shutil
 import string
-import tempfile
+import subprocess
+import threading
+import time
 import uuid
 from datetime import datetime
-from typing import Callable, Generator, List, Tuple
+from typing import Callable, Dict, Generator, List, Optional, Tuple
+from unittest.mock import MagicMock
 
 import pytest
 
 from ska_pst_send import Scan, VoltageRecorderScan
 
-TEST_DATA_DIR = "sendtest"
+# scan ids are drawn from a pool of UUIDs generated once, rather than for each scan
+SCAN_ID_POOL = [str(uuid.uuid4()) for _ in range(256)]
+
+# the loop wait of the threads under test, kept short so that the tests do not wait on the threads
+TEST_LOOP_WAIT = 0.005
+
+
+class SignallingCondition(threading.Condition):
+    """Condition variable with an event that is set while any thread is waiting on it.
+
+    The event is set and cleared while the lock is held, so a test that holds the lock and finds
+    the event set knows that a thread is inside its wait. A thread whose timed wait has just expired
+    may still miss a notification, so use notify_until_finished to stop a thread.
+    """
+
+    def __init__(self: SignallingCondition) -> None:
+        """Initialise the condition variable and its waiting event."""
+        threading.Condition.__init__(self)
+        self.waiting = threading.Event()
+        self._waiting_count = 0
+
+    def wait(self: SignallingCondition, timeout: Optional[float] = None) -> bool:
+        """Wait on the condition variable, setting the waiting event until the wait returns."""
+        self._waiting_count += 1
+        self.waiting.set()
+        try:
+            return threading.Condition.wait(self, timeout)
+        finally:
+            self._waiting_count -= 1
+            if self._waiting_count == 0:
+                self.waiting.clear()
+
+
+def notify_until_finished(cond: SignallingCondition, thread: threading.Thread, timeout: float = 5.0) -> None:
+    """Notify the condition whenever the thread is waiting on it, until the thread has finished.
+
+    :param cond: the condition variable that the thread waits on
+    :param thread: the thread to be stopped by the notification
+    :param timeout: the maximum time to wait for the thread to finish
+    """
+    deadline = time.monotonic() + timeout
+    while thread.is_alive() and time.monotonic() < deadline:
+        if cond.waiting.wait(timeout=TEST_LOOP_WAIT):
+            with cond:
+                if cond.waiting.is_set():
+                    cond.notify_all()
+        thread.join(timeout=TEST_LOOP_WAIT)
 
 
 def create_scan(product: pathlib.Path, scan: pathlib.Path) -> Scan:
@@ -38,9 +92,57 @@ def create_voltage_recorder_scan(product: pathlib.Path, scan: pathlib.Path) -> V
     return VoltageRecorderScan(product, scan)
 
 
-def remove_send_tempdir() -> None:
-    """Recursively remove all files and directories from the test data dir."""
-    shutil.rmtree(pathlib.Path(tempfile.gettempdir()) / TEST_DATA_DIR)
+def copy_voltage_recorder_scan(
+    template: pathlib.Path,
+    product: pathlib.Path,
+    scan: pathlib.Path,
+    copy_function: Callable[[str, str], object] = shutil.copy,
+) -> VoltageRecorderScan:
+    """Return a VoltageRecorderScan whose directory structure is a copy of the template directory.
+
+    By default the files are copied without their metadata, so that the copied files are newly
+    modified. Scans whose files are not modified by a test can instead be hard linked to the
+    template with ``copy_function=os.link``.
+    """
+    shutil.copytree(template, product / scan, copy_function=copy_function)
+    return VoltageRecorderScan(product, scan)
+
+
+def create_scan_files(full_scan_path: pathlib.Path, scan_files: List[str]) -> None:
+    """Create empty scan files, creating and opening each of their parent directories only once."""
+    file_names_by_parent: Dict[str, List[str]] = {}
+    for scan_file in scan_files:
+        (parent, file_name) = os.path.split(os.path.join(full_scan_path, scan_file))
+        file_names_by_parent.setdefault(parent, []).append(file_name)
+
+    for (parent, file_names) in file_names_by_parent.items():
+        os.makedirs(parent, mode=0o777, exist_ok=True)
+        # create the files relative to the open directory, so that its path is only resolved once
+        dir_fd = os.open(parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            for file_name in file_names:
+                # open and close only, as Path.touch would also reset the times of the new, empty file
+                os.close(os.open(file_name, os.O_CREAT | os.O_WRONLY, 0o644, dir_fd=dir_fd))
+        finally:
+            os.close(dir_fd)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def disable_logging() -> Generator[None, None, None]:
+    """Disable logging for the test session, as formatting and handling log records slows the tests."""
+    logging.disable(logging.CRITICAL)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture(autouse=True)
+def stub_subprocess_run(monkeypatch: pytest.MonkeyPatch) -> MagicMock:
+    """Replace subprocess.run with a mock that succeeds, so that no test runs the stat file processor."""
+    completed = MagicMock()
+    completed.returncode = 0
+    run = MagicMock(return_value=completed)
+    monkeypatch.setattr(subprocess, "run", run)
+    return run
 
 
 @pytest.fixture
@@ -52,37 +154,29 @@ def logger() -> logging.Logger:
 
 
 @pytest.fixture
-def send_tempdir() -> pathlib.Path:
-    """Return a path to the test data dir, under which files can be created."""
-    send_tempdir = pathlib.Path(tempfile.gettempdir()) / TEST_DATA_DIR
-    send_tempdir.mkdir(mode=0o777, parents=True, exist_ok=True)
-
-    return send_tempdir
-
-
-@pytest.fixture
-def local_product_path(send_tempdir: pathlib.Path) -> pathlib.Path:
-    """Return a local data product path."""
-    return send_tempdir / "local" / "product"
+def local_product_path(tmp_path_factory: pytest.TempPathFactory) -> pathlib.Path:
+    """Return a unique local data product path, which is removed by pytest."""
+    return tmp_path_factory.mktemp("local_product")
 
 
 @pytest.fixture
-def remote_product_path(send_tempdir: pathlib.Path) -> pathlib.Path:
-    """Return a remote data product path."""
-    return send_tempdir / "remote" / "product"
+def remote_product_path(tmp_path_factory: pytest.TempPathFactory) -> pathlib.Path:
+    """Return a unique remote data product path, which is removed by pytest."""
+    return tmp_path_factory.mktemp("remote_product")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def scan_id_factory() -> Callable[..., str]:
-    """Return a dynamically generated scan_id consisting of a UUID version 4 string."""
+    """Return a factory of scan_ids, each consisting of a UUID version 4 string."""
+    scan_ids = itertools.cycle(SCAN_ID_POOL)
 
     def _factory() -> str:
-        return str(uuid.uuid4())
+        return next(scan_ids)
 
     return _factory
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def eb_id() -> str:
     """Return a valid execution block id for test config."""
     rand_char = random.choice(string.ascii_lowercase)
@@ -93,19 +187,19 @@ def eb_id() -> str:
     return f"eb-{rand_char}{rand1:03d}-{today_str}-{rand2:05d}"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def subsystem_id() -> str:
     """Return a valid sub-system id. for test-config."""
     return random.choice(["pst-low", "pst-mid"])
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def scan_path(eb_id: str, subsystem_id: str, scan_id_factory: Callable[..., str]) -> pathlib.Path:
-    """Return a valid relative scan path."""
+    """Return a valid relative scan path, shared by tests as each has its own product paths."""
     return pathlib.Path(f"{eb_id}/{subsystem_id}/{scan_id_factory()}")
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def scan_path_factory(
     eb_id: str, subsystem_id: str, scan_id_factory: Callable[..., str]
 ) -> Callable[..., pathlib.Path]:
@@ -117,7 +211,7 @@ def scan_path_factory(
     return _factory
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def data_files() -> List[str]:
     """Return a list of 4 data filenames."""
     return [
@@ -128,7 +222,7 @@ def data_files() -> List[str]:
     ]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def weights_files() -> List[str]:
     """Return a list of 4 weights filenames."""
     return [
@@ -139,7 +233,7 @@ def weights_files() -> List[str]:
     ]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def stats_files() -> List[str]:
     """Return a list of 4 stats filenames."""
     return [
@@ -150,25 +244,34 @@ def stats_files() -> List[str]:
     ]
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def scan_files(data_files: List[str], weights_files: List[str]) -> List[str]:
     """Return a list of data and weights file names, 4 of each."""
     return data_files + weights_files
 
 
+@pytest.fixture(scope="session")
+def voltage_recording_scan_template(
+    tmp_path_factory: pytest.TempPathFactory, scan_files: List[str]
+) -> pathlib.Path:
+    """Return a directory containing 4 data and weights files, created once per session."""
+    template = tmp_path_factory.mktemp("voltage_recording_scan_template")
+    create_scan_files(template, scan_files)
+    return template
+
+
 @pytest.fixture
-def scan(local_product_path: pathlib.Path, scan_path: pathlib.Path) -> Generator[Scan, None, None]:
-    """Return a Scan fixture, which deletes data paths on finalisation."""
+def scan(local_product_path: pathlib.Path, scan_path: pathlib.Path) -> Scan:
+    """Return a Scan fixture."""
     scan = create_scan(local_product_path, scan_path)
     scan._scan_config_file.touch()
-    yield scan
-    remove_send_tempdir()
+    return scan
 
 
 @pytest.fixture
 def scan_factory(
     local_product_path: pathlib.Path, scan_path_factory: Callable[..., pathlib.Path]
-) -> Generator[Callable[..., Scan], None, None]:
+) -> Callable[..., Scan]:
     """Return a Scan with dynamically generated scan_id."""
 
     def _factory() -> Scan:
@@ -176,45 +279,41 @@ def scan_factory(
         scan._scan_config_file.touch()
         return scan
 
-    yield _factory
+    return _factory
 
 
 @pytest.fixture
 def voltage_recording_scan(
-    local_product_path: pathlib.Path, scan_path: pathlib.Path, scan_files: List[str]
-) -> Generator[VoltageRecorderScan, None, None]:
+    local_product_path: pathlib.Path, scan_path: pathlib.Path, voltage_recording_scan_template: pathlib.Path
+) -> VoltageRecorderScan:
     """
     Return a VoltageRecorderScan, initiailsed with 4 data and weights files.
 
-    Fixture deletes data, wieghts and paths on finalisation.
+    The files are created under a temporary product path, which is removed by pytest.
     """
-    scan = create_voltage_recorder_scan(local_product_path, scan_path)
+    scan = copy_voltage_recorder_scan(voltage_recording_scan_template, local_product_path, scan_path)
     scan._scan_config_file.touch()
-    for scan_file in scan_files:
-        full_scan_file_path = scan.full_scan_path / scan_file
-        full_scan_file_path.parent.mkdir(mode=0o777, parents=True, exist_ok=True)
-        full_scan_file_path.touch(mode=0o777)
 
-    yield scan
-    remove_send_tempdir()
+    return scan
 
 
 @pytest.fixture
 def voltage_recording_scan_factory(
-    local_product_path: pathlib.Path, scan_path_factory: Callable[..., pathlib.Path], scan_files: List[str]
-) -> Generator[Callable[..., VoltageRecorderScan], None, None]:
+    local_product_path: pathlib.Path,
+    scan_path_factory: Callable[..., pathlib.Path],
+    voltage_recording_scan_template: pathlib.Path,
+) -> Callable[..., VoltageRecorderScan]:
     """Return a Voltage RecorderScan, with dynamically generated scan_id and 4 data and weights files."""
 
     def _factory() -> VoltageRecorderScan:
-        scan = create_voltage_recorder_scan(local_product_path, scan_path_factory())
+        # the scans are only listed and deleted, so their files can be links to the template files
+        scan = copy_voltage_recorder_scan(
+            voltage_recording_scan_template, local_product_path, scan_path_factory(), copy_function=os.link
+        )
         scan._scan_config_file.touch()
-        for scan_file in scan_files:
-            full_scan_file_path = scan.full_scan_path / scan_file
-            full_scan_file_path.parent.mkdir(mode=0o777, parents=True, exist_ok=True)
-            full_scan_file_path.touch(mode=0o777)
         return scan
 
-    yield _factory
+    return _factory
 
 
 @pytest.fixture
@@ -222,40 +321,57 @@ def local_remote_scans(
     local_product_path: pathlib.Path,
     remote_product_path: pathlib.Path,
     scan_path: pathlib.Path,
-    scan_files: List[str],
-) -> Generator[Tuple[VoltageRecorderScan, VoltageRecorderScan], None, None]:
+    voltage_recording_scan_template: pathlib.Path,
+) -> Tuple[VoltageRecorderScan, VoltageRecorderScan]:
     """
     Return a local and remote VoltageRecorderScan.
 
     The local scan is initiailsed with 4 data and weights files, the remote scan with nothing.
-    The fixture removes the local and remote files and directories on finalisation.
+    Both scans are created under temporary product paths, which are removed by pytest.
     """
-    local_scan = create_voltage_recorder_scan(local_product_path, scan_path)
+    local_scan = copy_voltage_recorder_scan(voltage_recording_scan_template, local_product_path, scan_path)
     local_scan._scan_config_file.touch()
-    for scan_file in scan_files:
-        full_scan_file_path = local_scan.full_scan_path / scan_file
-        full_scan_file_path.parent.mkdir(mode=0o777, parents=True, exist_ok=True)
-        full_scan_file_path.touch(mode=0o777)
 
     remote_scan = create_voltage_recorder_scan(remote_product_path, scan_path)
 
-    yield (local_scan, remote_scan)
-    remove_send_tempdir()
+    return (local_scan, remote_scan)
+
+
+@pytest.fixture(scope="module")
+def three_local_scans_disk(
+    tmp_path_factory: pytest.TempPathFactory,
+    scan_path_factory: Callable[..., pathlib.Path],
+    voltage_recording_scan_template: pathlib.Path,
+) -> List[VoltageRecorderScan]:
+    """
+    Return 3 VoltageRecorderScans with unique scan_ids, whose files are created once per test module.
+
+    Tests must not modify the files of these scans, use voltage_recording_scan_factory instead.
+    """
+    local_product_path = tmp_path_factory.mktemp("local_product")
+    scan_paths = [scan_path_factory() for _ in range(3)]
+
+    # create the parent directories shared by the scans before the scans are copied concurrently
+    for parent in {p.parent for p in scan_paths}:
+        (local_product_path / parent).mkdir(parents=True, exist_ok=True)
+
+    def _copy_scan(scan_path: pathlib.Path) -> VoltageRecorderScan:
+        scan = copy_voltage_recorder_scan(
+            voltage_recording_scan_template, local_product_path, scan_path, copy_function=os.link
+        )
+        scan._scan_config_file.touch()
+        return scan
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(scan_paths)) as executor:
+        return list(executor.map(_copy_scan, scan_paths))
 
 
 @pytest.fixture
-def three_local_scans(
-    voltage_recording_scan_factory: Callable[..., VoltageRecorderScan]
-) -> Generator[List[VoltageRecorderScan], None, None]:
+def three_local_scans(three_local_scans_disk: List[VoltageRecorderScan]) -> List[VoltageRecorderScan]:
     """
     Return 3 VoltageRecorderScans that are dyanmically generated with unique scan_ids.
 
-    The fixture deletes the data files and paths upon finalisation.
+    The scans share their files with the other tests of the module, but are new objects so that
+    tests can modify their state.
     """
-    scans = []
-    scans.append(voltage_recording_scan_factory())
-    scans.append(voltage_recording_scan_factory())
-    scans.append(voltage_recording_scan_factory())
-
-    yield scans
-    remove_send_tempdir()
+    return [VoltageRecorderScan(s.data_product_path, s.relative_scan_path) for s in three_local_scans_disk]
@@ -7,95 +7,94 @@
 
 """This module contains the pytest tests for the DpdApiClient."""
 
-from unittest.mock import MagicMock, patch
+import json
+from typing import Any
+from unittest.mock import MagicMock
 
 import pytest
+import requests
 
 from ska_pst_send.dpd_api_client import DpdApiClient
 
 
-@pytest.fixture
+def create_response(status_code: int, payload: Any) -> requests.Response:
+    """Return a real HTTP response with the given status code and JSON payload."""
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers["Content-Type"] = "application/json"
+    response._content = json.dumps(payload).encode()
+    return response
+
+
+@pytest.fixture(scope="module")
 def dpd_api_endpoint() -> str:
     """Fixture for DPD endpoint."""
     return "http://example.com:8080"
 
 
+@pytest.fixture(scope="module")
+def dpd_api_session() -> MagicMock:
+    """Fixture for a mocked HTTP session, shared by the DpdApiClient of the module."""
+    return MagicMock(spec=requests.Session)
+
+
+@pytest.fixture(scope="module")
+def dpd_api_client(dpd_api_endpoint: str, dpd_api_session: MagicMock) -> DpdApiClient:
+    """Fixture for a DpdApiClient, shared by the tests that do not modify it."""
+    return DpdApiClient(dpd_api_endpoint, session=dpd_api_session)
+
+
 @pytest.fixture
-def dpd_api_client(dpd_api_endpoint: str) -> DpdApiClient:
-    """Fixture for DpdApiClient."""
-    return DpdApiClient(dpd_api_endpoint)
-
-
-@patch("ska_pst_send.dpd_api_client.requests.get")
-def test_metadata_exists_found(mock_get: MagicMock, dpd_api_client: DpdApiClient) -> None:
-    """Test metadata_exists method when metadata is found."""
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = [
-        {"metadata_file": "file1"},
-        {"metadata_file": "file2"},
-    ]
-    mock_get.return_value = mock_response
+def mock_get(dpd_api_session: MagicMock) -> MagicMock:
+    """Fixture for the get method of the mocked HTTP session, reset for each test."""
+    dpd_api_session.get.reset_mock(return_value=True, side_effect=True)
+    return dpd_api_session.get
+
+
+@pytest.mark.parametrize("search_value, expected_result", [("file1", True), ("file3", False)])
+def test_metadata_exists(
+    mock_get: MagicMock, dpd_api_client: DpdApiClient, search_value: str, expected_result: bool
+) -> None:
+    """Test metadata_exists method when metadata is, and is not, found."""
+    mock_get.return_value = create_response(200, [{"metadata_file": "file1"}, {"metadata_file": "file2"}])
 
     # Perform the metadata_exists check
-    result: bool = dpd_api_client.metadata_exists("file1")
+    result: bool = dpd_api_client.metadata_exists(search_value)
 
     # Check that the GET request was made with the correct URL
     mock_get.assert_called_once_with(
         "http://example.com:8080/dataproductlist", headers={"accept": "application/json"}
     )
 
-    # Check that the result is True since "file1" was found in the response
-    assert result is True
+    # Check that the result reflects whether the search value was in the response
+    assert result is expected_result
 
 
-@patch("ska_pst_send.dpd_api_client.requests.get")
-def test_metadata_exists_not_found(mock_get: MagicMock, dpd_api_client: DpdApiClient) -> None:
-    """Test metadata_exists method when metadata is not found."""
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.json.return_value = [
-        {"metadata_file": "file1"},
-        {"metadata_file": "file2"},
-    ]
-    mock_get.return_value = mock_response
+def test_metadata_exists_error(mock_get: MagicMock, dpd_api_client: DpdApiClient) -> None:
+    """Test metadata_exists method with an error status code."""
+    mock_get.return_value = create_response(500, {"detail": "Internal Server Error"})
 
-    # Perform the metadata_exists check for a non-existent file
-    result: bool = dpd_api_client.metadata_exists("file3")
-
-    # Check that the GET request was made with the correct URL
-    mock_get.assert_called_once_with(
-        "http://example.com:8080/dataproductlist", headers={"accept": "application/json"}
-    )
+    with pytest.raises(Exception) as excinfo:
+        dpd_api_client.metadata_exists("file1")
 
-    # Check that the result is False since "file3" was not found in the response
-    assert result is False
+    excinfo.match(r"^Failed to search for data products\. Status code: 500$")
 
 
-@patch("ska_pst_send.dpd_api_client.requests.get")
 def test_reindex_dataproducts_error(mock_get: MagicMock, dpd_api_client: DpdApiClient) -> None:
     """Test reindex_dataproducts method with an error status code."""
-    mock_response = MagicMock()
-    mock_response.status_code = 500
-    mock_get.return_value = mock_response
-
-    # Explicitly raise an exception when requests.get is called
-    mock_get.side_effect = Exception("Failed to make GET request")
+    mock_get.return_value = create_response(500, {"detail": "Internal Server Error"})
 
     # Perform the reindex
     with pytest.raises(Exception) as excinfo:
         dpd_api_client.reindex_dataproducts()
 
     # Check that the expected exception is raised
-    assert str(excinfo.value) == "Failed to make GET request"
+    excinfo.match(r"^Failed to reindex data products\. Status code: 500$")
 
 
-@patch("ska_pst_send.dpd_api_client.requests.get")
 def test_reindex_dataproducts_success(mock_get: MagicMock, dpd_api_client: DpdApiClient) -> None:
     """Test reindex_dataproducts method with a successful response."""
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_get.return_value = mock_response
+    mock_get.return_value = create_response(200, {})
 
     # Call the reindex_dataproducts method
     dpd_api_client.reindex_dataproducts()
@@ -106,8 +105,11 @@ def test_reindex_dataproducts_success(mock_get: MagicMock, dpd_api_client: DpdAp
     )
 
 
-def test_set_endpoint(dpd_api_client: DpdApiClient) -> None:
+def test_set_endpoint(dpd_api_endpoint: str) -> None:
     """Test the setter method for the endpoint property."""
+    # use a new client, as the shared client must keep its endpoint
+    dpd_api_client = DpdApiClient(dpd_api_endpoint)
+
     # Set a new endpoint
     dpd_api_client.endpoint = "http://new-example.com:8081"
 
@@ -7,18 +7,30 @@
 
 """Tests for the MetaDataBuilder class."""
 
-import os
-import pathlib
+import dataclasses
+from typing import Any, Dict, List, Tuple
 
+import pytest
 import yaml
 
 from ska_pst_send.metadata import PstConfig, PstContext, PstFiles, PstMetaData, PstObsCore
 from ska_pst_send.metadata_builder import MetaDataBuilder
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    # PyYAML has been built without libyaml
+    from yaml import SafeLoader  # type: ignore[assignment]
 
-def test_metadata_schema() -> None:
+
+@pytest.fixture(scope="session")
+def pst_mdb() -> MetaDataBuilder:
+    """Return a default MetaDataBuilder, shared by the tests that only inspect it."""
+    return MetaDataBuilder()
+
+
+def test_metadata_schema(pst_mdb: MetaDataBuilder) -> None:
     """Test the property is of the correct object type."""
-    pst_mdb = MetaDataBuilder()
     assert type(pst_mdb.pst_metadata) is PstMetaData
 
 
@@ -26,58 +38,83 @@ def test_metadata_schema() -> None:
 TODO: test compute values involving multiple dada files
 """
 
-pst_context = PstContext(
-    observer="jdoe",
-    intent="Tied-array beam observation of J1921+2153",
-    notes="notes TBD",
-)
-pst_config = PstConfig(image="artefact.skao.int/ska-pst/ska-pst", version="0.1.3")
-pst_files = [
-    PstFiles(
-        description="Channelised voltage data raw files",
-        path="data",
-        size=343326720,
-        status="done",
-    ),
-    PstFiles(
-        description="Channelised voltage weights raw files",
-        path="weights",
-        size=2954496,
-        status="done",
-    ),
-]
-pst_obscore = PstObsCore(
-    dataproduct_type="timeseries",
-    dataproduct_subtype="voltages",
-    calib_level=0,
-    obs_id="485",
-    access_estsize=343277568,
-    target_name="J1921+2153",
-    s_ra=19.362448611111116,
-    s_dec=1.4589333333333332,
-    t_min=40587,
-    t_max=40587.00000000229920260608196258544921875,
-    t_resolution=0.00020736000000000002,
-    t_exptime=207.36,
-    facility_name="SKA-Observatory",
-    instrument_name="SKA-LOW",
-    pol_xel=2,
-    pol_states="null",
-    em_xel=432,
-    em_unit="Hz",
-    em_min=999218750.0,
-    em_max=1000781250.0,
-    em_res_power="null",
-    em_resolution=3616.8981481481483,
-    o_ucd="null",
-)
-
-
-def test_write_metadata(send_tempdir: pathlib.Path) -> None:
-    """Test writing metadata dictionary into yaml file."""
-    pst_mdb = MetaDataBuilder(dsp_mount_path=send_tempdir)
 
-    assert pst_mdb.dsp_mount_path == send_tempdir, f"Expected {pst_mdb.dsp_mount_path} to be {send_tempdir}"
+@pytest.fixture(scope="module")
+def pst_context() -> PstContext:
+    """Return the expected context of the metadata."""
+    return PstContext(
+        observer="jdoe",
+        intent="Tied-array beam observation of J1921+2153",
+        notes="notes TBD",
+    )
+
+
+@pytest.fixture(scope="module")
+def pst_config() -> PstConfig:
+    """Return the expected config of the metadata."""
+    return PstConfig(image="artefact.skao.int/ska-pst/ska-pst", version="0.1.3")
+
+
+@pytest.fixture(scope="module")
+def pst_files() -> List[PstFiles]:
+    """Return the expected data and weights files of the metadata."""
+    return [
+        PstFiles(
+            description="Channelised voltage data raw files",
+            path="data",
+            size=343326720,
+            status="done",
+        ),
+        PstFiles(
+            description="Channelised voltage weights raw files",
+            path="weights",
+            size=2954496,
+            status="done",
+        ),
+    ]
+
+
+@pytest.fixture(scope="module")
+def pst_obscore() -> PstObsCore:
+    """Return the expected obscore of the metadata."""
+    return PstObsCore(
+        dataproduct_type="timeseries",
+        dataproduct_subtype="voltages",
+        calib_level=0,
+        obs_id="485",
+        access_estsize=343277568,
+        target_name="J1921+2153",
+        s_ra=19.362448611111116,
+        s_dec=1.4589333333333332,
+        t_min=40587,
+        t_max=40587.00000000229920260608196258544921875,
+        t_resolution=0.00020736000000000002,
+        t_exptime=207.36,
+        facility_name="SKA-Observatory",
+        instrument_name="SKA-LOW",
+        pol_xel=2,
+        pol_states="null",
+        em_xel=432,
+        em_unit="Hz",
+        em_min=999218750.0,
+        em_max=1000781250.0,
+        em_res_power="null",
+        em_resolution=3616.8981481481483,
+        o_ucd="null",
+    )
+
+
+@pytest.fixture(scope="module")
+def written_metadata(
+    tmp_path_factory: pytest.TempPathFactory,
+    pst_context: PstContext,
+    pst_config: PstConfig,
+    pst_files: List[PstFiles],
+    pst_obscore: PstObsCore,
+) -> Tuple[Dict[str, Any], MetaDataBuilder]:
+    """Return the metadata loaded from the YAML file written by a builder, and that builder."""
+    dsp_mount_path = tmp_path_factory.mktemp("meta")
+    pst_mdb = MetaDataBuilder(dsp_mount_path=dsp_mount_path)
 
     pst_mdb.pst_metadata.interface = "http://schema.skao.int/ska-data-product-meta/0.1"
     pst_mdb.pst_metadata.execution_block = "eb-19700101-485"
@@ -86,52 +123,27 @@ def test_write_metadata(send_tempdir: pathlib.Path) -> None:
     pst_mdb.pst_metadata.config = pst_config
     pst_mdb.pst_metadata.obscore = pst_obscore
 
-    file_name = "ska-data-product.yaml"
-    pst_mdb.write_metadata(file_name=file_name)
+    pst_mdb.write_metadata(file_name="ska-data-product.yaml")
 
-    absolute_path = f"{pst_mdb.dsp_mount_path}/ska-data-product.yaml"
+    with open(dsp_mount_path / "ska-data-product.yaml", "r") as yaml_file:
+        data = yaml.load(yaml_file, Loader=SafeLoader)
 
-    assert os.path.exists(absolute_path)
+    return (data, pst_mdb)
+
+
+def test_write_metadata(
+    written_metadata: Tuple[Dict[str, Any], MetaDataBuilder],
+    pst_files: List[PstFiles],
+    pst_obscore: PstObsCore,
+) -> None:
+    """Test writing metadata dictionary into yaml file."""
+    (data, pst_mdb) = written_metadata
 
-    with open(absolute_path, "r") as yaml_file:
-        data = yaml.safe_load(yaml_file)
+    assert (pst_mdb.dsp_mount_path / "ska-data-product.yaml").exists()
 
     # Update the properties of the metadata object with loaded data
-    assert data.get("interface") == pst_mdb.pst_metadata.interface
-    assert data.get("execution_block") == pst_mdb.pst_metadata.execution_block
-    # Data files
-    assert data.get("files")[0]["description"] == pst_mdb.pst_metadata.files[0].description
-    assert data.get("files")[0]["path"] == pst_mdb.pst_metadata.files[0].path
-    assert data.get("files")[0]["size"] == pst_mdb.pst_metadata.files[0].size
-    assert data.get("files")[0]["status"] == pst_mdb.pst_metadata.files[0].status
-    # Weights files
-    assert data.get("files")[1]["description"] == pst_mdb.pst_metadata.files[1].description
-    assert data.get("files")[1]["path"] == pst_mdb.pst_metadata.files[1].path
-    assert data.get("files")[1]["size"] == pst_mdb.pst_metadata.files[1].size
-    assert data.get("files")[1]["status"] == pst_mdb.pst_metadata.files[1].status
-
-    assert data.get("obscore")["dataproduct_type"] == pst_mdb.pst_metadata.obscore.dataproduct_type
-    assert data.get("obscore")["dataproduct_subtype"] == pst_mdb.pst_metadata.obscore.dataproduct_subtype
-    assert data.get("obscore")["calib_level"] == pst_mdb.pst_metadata.obscore.calib_level
-    assert data.get("obscore")["obs_id"] == pst_mdb.pst_metadata.obscore.obs_id
-    assert data.get("obscore")["access_estsize"] == pst_mdb.pst_metadata.obscore.access_estsize
-    assert data.get("obscore")["target_name"] == pst_mdb.pst_metadata.obscore.target_name
-    assert data.get("obscore")["s_ra"] == pst_mdb.pst_metadata.obscore.s_ra
-    assert data.get("obscore")["s_dec"] == pst_mdb.pst_metadata.obscore.s_dec
-    assert data.get("obscore")["t_min"] == pst_mdb.pst_metadata.obscore.t_min
-    assert data.get("obscore")["t_max"] == pst_mdb.pst_metadata.obscore.t_max
-    assert data.get("obscore")["t_resolution"] == pst_mdb.pst_metadata.obscore.t_resolution
-    assert data.get("obscore")["t_exptime"] == pst_mdb.pst_metadata.obscore.t_exptime
-    assert data.get("obscore")["facility_name"] == pst_mdb.pst_metadata.obscore.facility_name
-    assert data.get("obscore")["instrument_name"] == pst_mdb.pst_metadata.obscore.instrument_name
-    assert data.get("obscore")["pol_xel"] == pst_mdb.pst_metadata.obscore.pol_xel
-    assert data.get("obscore")["pol_states"] == pst_mdb.pst_metadata.obscore.pol_states
-    assert data.get("obscore")["em_xel"] == pst_mdb.pst_metadata.obscore.em_xel
-    assert data.get("obscore")["em_unit"] == pst_mdb.pst_metadata.obscore.em_unit
-    assert data.get("obscore")["em_min"] == pst_mdb.pst_metadata.obscore.em_min
-    assert data.get("obscore")["em_max"] == pst_mdb.pst_metadata.obscore.em_max
-    assert data.get("obscore")["em_res_power"] == pst_mdb.pst_metadata.obscore.em_res_power
-    assert data.get("obscore")["em_resolution"] == pst_mdb.pst_metadata.obscore.em_resolution
-    assert data.get("obscore")["o_ucd"] == pst_mdb.pst_metadata.obscore.o_ucd
-
-    os.unlink(absolute_path)
+    assert data["interface"] == pst_mdb.pst_metadata.interface
+    assert data["execution_block"] == pst_mdb.pst_metadata.execution_block
+    # Data and weights files
+    assert data["files"] == [dataclasses.asdict(f) for f in pst_files]
+    assert data["obscore"] == dataclasses.asdict(pst_obscore)
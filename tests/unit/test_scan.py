@@ -7,23 +7,21 @@
 
 """This module contains the pytest tests for the scans."""
 
+import os
 import pathlib
 from typing import Callable
 
 from ska_pst_send import Scan
-from tests.conftest import create_scan, remove_send_tempdir
+from tests.conftest import create_scan
 
 
 def test_constructor(local_product_path: pathlib.Path, scan_path: pathlib.Path) -> None:
     """Test the Scan constructor correctly initialises an object."""
-    try:
-        scan = create_scan(local_product_path, scan_path)
-        assert scan.scan_config_file_exists() is False
-        assert scan.is_recording()
-        assert scan.data_product_file_exists() is False
-        assert scan.is_complete() is False
-    finally:
-        remove_send_tempdir()
+    scan = create_scan(local_product_path, scan_path)
+    assert scan.scan_config_file_exists() is False
+    assert scan.is_recording()
+    assert scan.data_product_file_exists() is False
+    assert scan.is_complete() is False
 
 
 def test_scan_parameters(scan: Scan) -> None:
@@ -69,9 +67,5 @@ def test_delete_multiple_scans(scan_factory: Callable[..., Scan]) -> None:
     assert scan2.path_exists() is False
 
     # check the data product path for both scans is now empty
-    count = 0
-    for child in scan1.data_product_path.iterdir():
-        count += 1
-    assert count == 0
-
-    remove_send_tempdir()
+    with os.scandir(scan1.data_product_path) as entries:
+        assert next(entries, None) is None
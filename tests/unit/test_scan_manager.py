@@ -9,12 +9,41 @@
 
 import logging
 import random
-import time
-from typing import List
+import zlib
+from types import SimpleNamespace
+from typing import Callable, List, Optional
+
+import pytest
 
 from ska_pst_send import ScanManager, VoltageRecorderScan
 from ska_pst_send.voltage_recorder_scan import NANOSECONDS_PER_SEC
 
+# an arbitrary, fixed, current time so that the scan modified times do not depend on the wall clock
+FIXED_NOW_NS = 1_700_000_000_000_000_000
+
+
+@pytest.fixture
+def fixed_now_ns(monkeypatch: pytest.MonkeyPatch) -> int:
+    """Freeze the current time used by the ScanManager, returning that time in nanoseconds."""
+    frozen_time = SimpleNamespace(time=lambda: FIXED_NOW_NS / NANOSECONDS_PER_SEC)
+    monkeypatch.setattr("ska_pst_send.scan_manager.time", frozen_time)
+    return FIXED_NOW_NS
+
+
+@pytest.fixture
+def deterministic_rng(request: pytest.FixtureRequest) -> random.Random:
+    """Return a random number generator seeded from the test id, so that each permutation is reproducible."""
+    return random.Random(zlib.crc32(request.node.nodeid.encode()))
+
+
+def assert_scan_equivalent(actual: Optional[VoltageRecorderScan], expected: VoltageRecorderScan) -> None:
+    """Assert that the actual scan has the same paths and files as the expected scan."""
+    assert actual is not None, "Expected scan to not be None"
+    assert actual.relative_scan_path == expected.relative_scan_path
+    assert actual.data_product_path == expected.data_product_path
+    assert actual.full_scan_path == expected.full_scan_path
+    assert actual.get_all_files() == expected.get_all_files()
+
 
 def test_constructor(three_local_scans: List[VoltageRecorderScan], subsystem_id: str) -> None:
     """Test that the ScanManager constructor correctly initialises an object."""
@@ -48,16 +77,15 @@ def test_oldest_scan(three_local_scans: List[VoltageRecorderScan], subsystem_id:
     oldest = scan_manager.next_unprocessed_scan()
 
     # for now, rely on the scan_manager to order the _scans attribute correctly
-    assert oldest is not None, "Expected oldest scan to not be None"
-    assert oldest.relative_scan_path == scan_manager._scans[0].relative_scan_path
-    assert oldest.data_product_path == scan_manager._scans[0].data_product_path
-    assert oldest.full_scan_path == scan_manager._scans[0].full_scan_path
-    assert oldest.get_all_files == scan_manager._scans[0].get_all_files
+    assert_scan_equivalent(oldest, scan_manager._scans[0])
 
 
-def test_delete_scan(three_local_scans: List[VoltageRecorderScan], subsystem_id: str) -> None:
+def test_delete_scan(
+    voltage_recording_scan_factory: Callable[..., VoltageRecorderScan], subsystem_id: str
+) -> None:
     """Test the ScanManager detects scans that have been processed and deleted."""
-    scan_list = three_local_scans
+    # the scans are deleted, so they cannot be shared with the other tests
+    scan_list = [voltage_recording_scan_factory() for _ in range(3)]
     data_product_path = scan_list[0].data_product_path
     scan_manager = ScanManager(data_product_path, subsystem_id)
 
@@ -75,11 +103,7 @@ def test_delete_scan(three_local_scans: List[VoltageRecorderScan], subsystem_id:
         assert len(scan_manager._scans) == len(scan_list) - (i + 1)
 
         if (i + 1) < len(scan_list):
-            assert oldest is not None, "Expected oldest scan to not be None"
-            assert oldest.relative_scan_path == scan_manager._scans[0].relative_scan_path
-            assert oldest.data_product_path == scan_manager._scans[0].data_product_path
-            assert oldest.full_scan_path == scan_manager._scans[0].full_scan_path
-            assert oldest.get_all_files == scan_manager._scans[0].get_all_files
+            assert_scan_equivalent(oldest, scan_manager._scans[0])
         else:
             assert oldest is None
 
@@ -89,22 +113,24 @@ def test_delete_scan(three_local_scans: List[VoltageRecorderScan], subsystem_id:
 
 
 def test_next_unprocessed_scan_gets_scan_with_earliest_modified_time(
-    three_local_scans: List[VoltageRecorderScan], subsystem_id: str
+    three_local_scans: List[VoltageRecorderScan],
+    subsystem_id: str,
+    deterministic_rng: random.Random,
+    fixed_now_ns: int,
 ) -> None:
     """Test scan manager returns oldest scan if all are active."""
     scan_list = three_local_scans
     data_product_path = scan_list[0].data_product_path
-    random.shuffle(scan_list)
 
     scan_offset_ns: int = int(30 * NANOSECONDS_PER_SEC)
-    now_ns = time.time_ns()
+    now_ns = fixed_now_ns
     for (idx, s) in enumerate(scan_list):
         s._modified_time_ns = now_ns - idx * scan_offset_ns
 
-    expected_scan = scan_list[-1]
+    expected_scan = min(scan_list, key=lambda s: s._modified_time_ns)
 
-    # shuffle again
-    random.shuffle(scan_list)
+    # shuffle the scans so that the expected scan is not found by its position
+    deterministic_rng.shuffle(scan_list)
     scan_manager = ScanManager(data_product_path, subsystem_id)
     scan_manager._scans = scan_list
 
@@ -113,27 +139,30 @@ def test_next_unprocessed_scan_gets_scan_with_earliest_modified_time(
 
 
 def test_next_unprocessed_scan_gets_only_active_scans_if_multiple_scans(
-    three_local_scans: List[VoltageRecorderScan], subsystem_id: str
+    three_local_scans: List[VoltageRecorderScan],
+    subsystem_id: str,
+    deterministic_rng: random.Random,
+    fixed_now_ns: int,
 ) -> None:
     """Test scan manager returns oldest active scan, ignoring in inactive scans."""
     scan_list = [*three_local_scans]
     data_product_path = scan_list[0].data_product_path
-    random.shuffle(scan_list)
 
     scan_timeout_sec = 10
     scan_timeout_ns: int = int(scan_timeout_sec * NANOSECONDS_PER_SEC)
 
-    now_ns = time.time_ns()
+    now_ns = fixed_now_ns
 
     # setup a modified time earlier than active modified time
     # this sets up 2 inactive scans
     for (idx, s) in enumerate(scan_list[:-1]):
         s._modified_time_ns = now_ns - (idx + 2) * scan_timeout_ns
 
+    # the only active scan
     expected_scan = scan_list[-1]
 
-    # shuffle again
-    random.shuffle(scan_list)
+    # shuffle the scans so that the expected scan is not found by its position
+    deterministic_rng.shuffle(scan_list)
     scan_manager = ScanManager(data_product_path, subsystem_id, scan_timeout=scan_timeout_sec)
     scan_manager._scans = scan_list
 
@@ -142,17 +171,20 @@ def test_next_unprocessed_scan_gets_only_active_scans_if_multiple_scans(
 
 
 def test_next_unprocessed_scan_gets_oldest_inactive_scan_if_no_active_scan(
-    three_local_scans: List[VoltageRecorderScan], subsystem_id: str, logger: logging.Logger
+    three_local_scans: List[VoltageRecorderScan],
+    subsystem_id: str,
+    logger: logging.Logger,
+    deterministic_rng: random.Random,
+    fixed_now_ns: int,
 ) -> None:
     """Test scan manager returns oldest inactive scan if no active scans available."""
     scan_list = [*three_local_scans]
     data_product_path = scan_list[0].data_product_path
-    random.shuffle(scan_list)
 
     scan_timeout_sec = 10
     scan_timeout_ns: int = int(scan_timeout_sec * NANOSECONDS_PER_SEC)
 
-    now_ns = time.time_ns()
+    now_ns = fixed_now_ns
 
     # setup a modified time earlier than active modified time
     # all scans are modified before active time
@@ -162,10 +194,10 @@ def test_next_unprocessed_scan_gets_oldest_inactive_scan_if_no_active_scan(
     for s in scan_list:
         logger.info(f"{s} has modified time of {s.modified_time_secs}")
 
-    expected_scan = scan_list[-1]
+    expected_scan = min(scan_list, key=lambda s: s._modified_time_ns)
 
-    # shuffle again
-    random.shuffle(scan_list)
+    # shuffle the scans so that the expected scan is not found by its position
+    deterministic_rng.shuffle(scan_list)
 
     scan_manager = ScanManager(data_product_path, subsystem_id, scan_timeout=scan_timeout_sec)
     scan_manager._scans = scan_list
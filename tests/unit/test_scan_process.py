@@ -7,6 +7,8 @@
 
 """This module contains the pytest tests for the scan process thread."""
 
+from __future__ import annotations
+
 import subprocess
 import threading
 import time
@@ -15,8 +17,9 @@ from unittest.mock import MagicMock
 
 import pytest
 
-import ska_pst_send.voltage_recorder_scan
+import ska_pst_send.metadata_builder
 from ska_pst_send import ScanProcess, VoltageRecorderFile, VoltageRecorderScan
+from tests.conftest import TEST_LOOP_WAIT, SignallingCondition, create_scan_files, notify_until_finished
 
 
 def test_constructor(voltage_recording_scan: VoltageRecorderScan, scan_files: List[str]) -> None:
@@ -26,6 +29,7 @@ def test_constructor(voltage_recording_scan: VoltageRecorderScan, scan_files: Li
     cond = threading.Condition()
     scan_process = ScanProcess(scan, cond)
     assert scan_process.completed is False
+    assert scan_process.finished.is_set() is False
     assert scan_process.is_alive() is False
     assert len(scan.get_all_files()) == len(scan_files) + 1
 
@@ -40,42 +44,45 @@ def test_process(
 ) -> None:
     """Test the ScanProcess can fully process a completed scan."""
     scan = voltage_recording_scan
+    full_scan_path = scan.full_scan_path
+    data_product_path = scan.data_product_path
     assert len(scan.get_all_files()) == len(scan_files) + 1
 
+    # the first unprocessed data, weights and stat files of the scan
+    expected = (
+        VoltageRecorderFile(full_scan_path / data_files[0], data_product_path),
+        VoltageRecorderFile(full_scan_path / weights_files[0], data_product_path),
+        VoltageRecorderFile(full_scan_path / stats_files[0], data_product_path),
+    )
+
     mock_metadata_builder = MagicMock()
-    monkeypatch.setattr(ska_pst_send.voltage_recorder_scan, "MetaDataBuilder", mock_metadata_builder)
+    monkeypatch.setattr(ska_pst_send.metadata_builder, "MetaDataBuilder", mock_metadata_builder)
+
+    files_processed = threading.Event()
 
     def _process_side_effect(*args: Any, **kwargs: Any) -> MagicMock:
-        # ensure the file is created
-        for sf in stats_files:
-            full_sf = scan.full_scan_path / sf
-            full_sf.parent.mkdir(mode=0o777, parents=True, exist_ok=True)
-            full_sf.touch()
+        # ensure the files are created
+        create_scan_files(full_scan_path, stats_files)
+        files_processed.set()
 
         completed = MagicMock()
         completed.returncode = 0
         return completed
 
-    mocked_cmd = MagicMock(side_effect=_process_side_effect)
-    monkeypatch.setattr(subprocess, "run", mocked_cmd)
+    monkeypatch.setattr(subprocess, "run", _process_side_effect)
 
     cond = threading.Condition()
-    scan_process = ScanProcess(scan, cond, loop_wait=0.1, minimum_age=0)
+    scan_process = ScanProcess(scan, cond, loop_wait=TEST_LOOP_WAIT, minimum_age=0)
 
     # Assert that there are unprocessed files
-    expected = (
-        VoltageRecorderFile(scan.full_scan_path / data_files[0], scan.data_product_path),
-        VoltageRecorderFile(scan.full_scan_path / weights_files[0], scan.data_product_path),
-        VoltageRecorderFile(scan.full_scan_path / stats_files[0], scan.data_product_path),
-    )
     assert scan.next_unprocessed_file(minimum_age=0) == expected
 
     # start the ScanProcess thread
     scan_process.start()
     assert scan_process.is_alive()
 
-    # wait some time for the ScanProcess to process the data files
-    time.sleep(0.5)
+    # wait for the ScanProcess to process the data files
+    assert files_processed.wait(timeout=5.0), "expected the ScanProcess to process the data files"
 
     # assert there are no more unprocessed files
     assert scan.next_unprocessed_file(minimum_age=0) is None
@@ -88,17 +95,17 @@ def test_process(
     scan._data_product_file.touch()
     scan._scan_completed_file.touch()
 
-    # wait some time for the ScanProcess to process the data files
-    while scan_process.is_alive():
-        time.sleep(0.1)
+    # wait for the ScanProcess to complete the scan
+    assert scan_process.finished.wait(timeout=5.0), "expected the ScanProcess to finish processing"
+    scan_process.join(timeout=5.0)
+    assert not scan_process.is_alive(), "expected the ScanProcess thread to have exited"
 
     # assert that the Scan Process thread exited naturally
     assert scan_process.completed
-    scan_process.join()
 
     # assert that each expected stat file exists with the expected name
     for stat_file in stats_files:
-        stat_file_path = scan.full_scan_path / stat_file
+        stat_file_path = full_scan_path / stat_file
         assert stat_file_path.exists()
 
 
@@ -110,7 +117,7 @@ def test_abort_process(
     scan = voltage_recording_scan
     assert not scan.transfer_failed, "expected scan's transfer_failed to be False"
     assert not scan.processing_failed, "expected scan's processing_failed to be False"
-    cond = threading.Condition()
+    cond = SignallingCondition()
 
     def _process_side_effect(*args: Any, **kwargs: Any) -> MagicMock:
         # ensure the file is created
@@ -118,23 +125,15 @@ def test_abort_process(
         completed.returncode = 0
         return completed
 
-    mocked_cmd = MagicMock(side_effect=_process_side_effect)
-    monkeypatch.setattr(subprocess, "run", mocked_cmd)
+    monkeypatch.setattr(subprocess, "run", _process_side_effect)
 
-    scan_process = ScanProcess(scan, cond, loop_wait=0.1)
+    scan_process = ScanProcess(scan, cond, loop_wait=TEST_LOOP_WAIT)
     scan_process.start()
     assert scan_process.is_alive()
 
-    time.sleep(scan_process.loop_wait)
-
-    with cond:
-        cond.notify()
-
-    # wait for 2 x loop_wait for the process to exit
-    time.sleep(scan_process.loop_wait)
-    scan_process.join()
+    notify_until_finished(cond, scan_process)
 
-    assert scan_process.is_alive() is False
+    assert scan_process.is_alive() is False, "expected the ScanProcess thread to have exited"
     assert scan_process.completed is False
     assert not scan.transfer_failed, "expected scan's transfer_failed to be False"
     assert not scan.processing_failed, "expected scan's processing_failed to be False"
@@ -156,21 +155,19 @@ def test_run_exits_if_transfer_fails(
         completed.returncode = 0
         return completed
 
-    mocked_cmd = MagicMock(side_effect=_process_side_effect)
-    monkeypatch.setattr(subprocess, "run", mocked_cmd)
+    monkeypatch.setattr(subprocess, "run", _process_side_effect)
 
-    scan_process = ScanProcess(scan, cond, loop_wait=0.1)
+    scan_process = ScanProcess(scan, cond, loop_wait=TEST_LOOP_WAIT)
     scan_process.start()
     assert scan_process.is_alive()
 
-    time.sleep(0.1)
+    time.sleep(3 * TEST_LOOP_WAIT)
     scan.transfer_failed = True
 
-    # wait for 2 x loop_wait for the process to exit
-    time.sleep(scan_process.loop_wait)
-    scan_process.join()
+    # the process exits within a loop_wait, allowing plenty of time before it is considered hung
+    scan_process.join(timeout=5.0)
 
-    assert scan_process.is_alive() is False
+    assert scan_process.is_alive() is False, "expected the ScanProcess thread to have exited"
     assert scan_process.completed is False
     assert scan.transfer_failed, "expected scan's transfer_failed to be True"
     assert not scan.processing_failed, "expected scan's processing_failed to be False"
@@ -190,15 +187,14 @@ def test_run_exits_if_exception_thrown(
         # ensure the file is created
         raise Exception("process error")
 
-    mocked_cmd = MagicMock(side_effect=_process_side_effect)
-    monkeypatch.setattr(voltage_recording_scan, "process_next_unprocessed_file", mocked_cmd)
+    monkeypatch.setattr(voltage_recording_scan, "process_next_unprocessed_file", _process_side_effect)
 
-    scan_process = ScanProcess(scan, cond, loop_wait=0.1)
+    scan_process = ScanProcess(scan, cond, loop_wait=TEST_LOOP_WAIT)
     scan_process.start()
 
-    scan_process.join()
+    scan_process.join(timeout=5.0)
 
-    assert scan_process.is_alive() is False
+    assert scan_process.is_alive() is False, "expected the ScanProcess thread to have exited"
     assert scan_process.completed is False
     assert not scan.transfer_failed, "expected scan's transfer_failed to be False"
     assert scan.processing_failed, "expected scan's processing_failed to be True"
@@ -15,6 +15,7 @@ from unittest.mock import MagicMock
 import pytest
 
 from ska_pst_send import ScanTransfer, VoltageRecorderScan
+from tests.conftest import TEST_LOOP_WAIT, SignallingCondition, notify_until_finished
 
 
 def test_constructor(local_remote_scans: Tuple[VoltageRecorderScan, VoltageRecorderScan]) -> None:
@@ -39,23 +40,24 @@ def test_transfer(
     assert len(remote_scan.get_all_files()) == 0
 
     cond = threading.Condition()
-    scan_transfer = ScanTransfer(local_scan, remote_scan, cond, loop_wait=0.1, minimum_age=0)
+    scan_transfer = ScanTransfer(
+        local_scan, remote_scan, cond, loop_wait=TEST_LOOP_WAIT, file_wait=TEST_LOOP_WAIT, minimum_age=0
+    )
     scan_transfer.start()
 
     assert scan_transfer.is_alive()
 
     # wait some time for the ScanTransfer to transfer the data files
-    time.sleep(0.1)
+    time.sleep(3 * TEST_LOOP_WAIT)
 
     local_scan._scan_completed_file.touch()
     local_scan._data_product_file.touch()
 
-    # busy wait for the scan to be transferred
-    while scan_transfer.is_alive():
-        time.sleep(0.5)
+    # wait for the scan to be transferred
+    scan_transfer.join(timeout=5.0)
+    assert not scan_transfer.is_alive(), "expected the ScanTransfer thread to have exited"
 
     assert scan_transfer.completed
-    scan_transfer.join()
 
     assert len(remote_scan.get_all_files()) == len(local_scan.get_all_files())
 
@@ -71,23 +73,17 @@ def test_aborted_transfer(
     local_scan.update_files()
     remote_scan.update_files()
 
-    cond = threading.Condition()
-    scan_transfer = ScanTransfer(local_scan, remote_scan, cond, loop_wait=0.1)
+    cond = SignallingCondition()
+    scan_transfer = ScanTransfer(
+        local_scan, remote_scan, cond, loop_wait=TEST_LOOP_WAIT, file_wait=TEST_LOOP_WAIT
+    )
     scan_transfer.start()
 
     assert scan_transfer.is_alive()
 
-    # wait some time for the ScanTransfer to transfer the data files
-    time.sleep(0.5)
-
-    with cond:
-        cond.notify()
+    notify_until_finished(cond, scan_transfer)
+    assert not scan_transfer.is_alive(), "expected the ScanTransfer thread to have exited"
 
-    # busy wait for the scan to be transferred
-    while scan_transfer.is_alive():
-        time.sleep(0.1)
-
-    scan_transfer.join()
     assert scan_transfer.completed is False
     assert not local_scan.transfer_failed, "expected local_scan's transfer_failed to be False"
     assert not local_scan.processing_failed, "expected local_scan's processing_failed to be False"
@@ -109,17 +105,20 @@ def test_run_exits_if_processing_fails(
     remote_scan.update_files()
 
     cond = threading.Condition()
-    scan_transfer = ScanTransfer(local_scan, remote_scan, cond, loop_wait=0.1)
+    scan_transfer = ScanTransfer(
+        local_scan, remote_scan, cond, loop_wait=TEST_LOOP_WAIT, file_wait=TEST_LOOP_WAIT
+    )
     scan_transfer.start()
 
     assert scan_transfer.is_alive()
 
     # wait some time for the ScanTransfer to transfer the data files
-    time.sleep(0.1)
+    time.sleep(3 * TEST_LOOP_WAIT)
 
     local_scan.processing_failed = True
 
-    scan_transfer.join()
+    scan_transfer.join(timeout=5.0)
+    assert not scan_transfer.is_alive(), "expected the ScanTransfer thread to have exited"
 
     assert scan_transfer.completed is False
     assert not local_scan.transfer_failed, "expected local_scan's transfer_failed to be False"
@@ -145,15 +144,16 @@ def test_run_exits_if_exception_thrown(
         # ensure the file is created
         raise Exception("transfer error")
 
-    mocked_cmd = MagicMock(side_effect=_process_side_effect)
-    monkeypatch.setattr(ScanTransfer, "_transfer_files", mocked_cmd)
+    monkeypatch.setattr(ScanTransfer, "_transfer_files", _process_side_effect)
 
-    scan_transfer = ScanTransfer(local_scan, remote_scan, cond, loop_wait=0.1)
+    scan_transfer = ScanTransfer(
+        local_scan, remote_scan, cond, loop_wait=TEST_LOOP_WAIT, file_wait=TEST_LOOP_WAIT
+    )
     scan_transfer.start()
 
-    scan_transfer.join()
+    scan_transfer.join(timeout=5.0)
 
-    assert scan_transfer.is_alive() is False
+    assert scan_transfer.is_alive() is False, "expected the ScanTransfer thread to have exited"
     assert scan_transfer.completed is False
     assert local_scan.transfer_failed, "expected local_scan's transfer_failed to be True"
     assert not local_scan.processing_failed, "expected local_scan's processing_failed to be False"
@@ -8,24 +8,62 @@
 """This module contains the pytest tests for the ScanManager."""
 from __future__ import annotations
 
+import functools
 import logging
+import pathlib
 import subprocess
 import threading
 import time
-from typing import Any, Tuple, cast
+from typing import Any, Callable, List, Tuple, cast
 from unittest.mock import MagicMock  # Import the necessary modules
 
 import pytest
 
 from ska_pst_send import ScanProcess, ScanTransfer, SdpTransfer, VoltageRecorderScan
+from tests.conftest import TEST_LOOP_WAIT, SignallingCondition, create_scan_files
+
+
+def process_until_interrupted(
+    sdp_transfer: SdpTransfer, until: Callable[[], bool] = lambda: True, timeout: float = 5.0
+) -> None:
+    """Run the processing of an SdpTransfer, interrupting it once it waits and the until predicate is met.
+
+    :param sdp_transfer: the SdpTransfer to run and then interrupt
+    :param until: predicate that is polled after the first wait, defaults to interrupting at the first wait
+    :param timeout: the maximum time to wait for the predicate, after which the processing is interrupted
+    """
+    # the condition is shared with the ScanProcess and ScanTransfer threads of the SdpTransfer
+    cond = SignallingCondition()
+    sdp_transfer._cond = cond
+    returned = threading.Event()
+
+    def _interrupt() -> None:
+        cond.waiting.wait(timeout=timeout)
+        deadline = time.monotonic() + timeout
+        while not until() and time.monotonic() < deadline:
+            returned.wait(timeout=TEST_LOOP_WAIT)
+        # keep interrupting, as each thread only receives the notifications made while it waits
+        while not returned.is_set():
+            sdp_transfer.interrrupt_processing()
+            returned.wait(timeout=TEST_LOOP_WAIT)
+
+    thread = threading.Thread(target=_interrupt, daemon=True)
+    thread.start()
+    try:
+        sdp_transfer.process()
+    finally:
+        returned.set()
+        thread.join(timeout=5.0)
 
 
 def test_sdp_transfer_process(
     local_remote_scans: Tuple[VoltageRecorderScan, VoltageRecorderScan],
     subsystem_id: str,
+    scan_files: List[str],
+    stats_files: List[str],
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
-    """Test the process method of SdpTransfer."""
+    """Test the process method of SdpTransfer processes and transfers the files of a scan."""
     (local_scan, remote_scan) = local_remote_scans
 
     local_path = local_scan.data_product_path
@@ -34,30 +72,38 @@ def test_sdp_transfer_process(
     verbose = False
     sdp_transfer = SdpTransfer(local_path, remote_path, subsystem_id, data_product_dasboard, verbose)
 
-    def _process_side_effect(*args: Any, **kwargs: Any) -> MagicMock:
-        # ensure the file is created
-        for sf in local_scan._stats_files:
-            (local_scan.full_scan_path / sf.data_product_path).touch()
+    # the files of the scan have just been created, so process and transfer them without waiting
+    monkeypatch.setattr(
+        "ska_pst_send.sdp_transfer.ScanProcess",
+        functools.partial(ScanProcess, loop_wait=TEST_LOOP_WAIT, minimum_age=0),
+    )
+    monkeypatch.setattr(
+        "ska_pst_send.sdp_transfer.ScanTransfer",
+        functools.partial(ScanTransfer, loop_wait=TEST_LOOP_WAIT, file_wait=0, minimum_age=0),
+    )
+
+    def _process_side_effect(command: List[str], *args: Any, **kwargs: Any) -> MagicMock:
+        # the stat file is named after the data file given by the -d argument
+        data_file = pathlib.Path(command[command.index("-d") + 1])
+        create_scan_files(local_scan.full_scan_path, [f"stat/{data_file.stem}.h5"])
 
         completed = MagicMock()
         completed.returncode = 0
         return completed
 
-    mocked_cmd = MagicMock(side_effect=_process_side_effect)
-    monkeypatch.setattr(subprocess, "run", mocked_cmd)
+    monkeypatch.setattr(subprocess, "run", _process_side_effect)
+
+    expected_files = [*scan_files, *stats_files]
 
-    local_scan._scan_completed_file.touch()
-    local_scan._data_product_file.touch()
+    def _transferred() -> bool:
+        return all((remote_scan.full_scan_path / f).exists() for f in expected_files)
 
-    def _interrupt_processing() -> None:
-        # """Sleep for a timeout, then interrupt SdpTransfer processing."""
-        time.sleep(5)
-        sdp_transfer.interrrupt_processing()
+    process_until_interrupted(sdp_transfer, until=_transferred)
 
-    notify_thread = threading.Thread(target=_interrupt_processing, daemon=True)
-    notify_thread.start()
-    sdp_transfer.process()
-    notify_thread.join()
+    for stat_file in stats_files:
+        assert (local_scan.full_scan_path / stat_file).exists()
+    for scan_file in expected_files:
+        assert (remote_scan.full_scan_path / scan_file).exists()
 
 
 def test_metadata_exists_called_with_correct_search_value(
@@ -104,16 +150,7 @@ def test_metadata_exists_called_with_correct_search_value(
         "ska_pst_send.sdp_transfer.VoltageRecorderScan", lambda *args, **kwargs: mock_voltage_recorder_scan
     )
 
-    def _stop_process() -> None:
-        import time
-
-        time.sleep(1)
-        sdp_transfer.interrrupt_processing()
-
-    t = threading.Thread(target=_stop_process)
-    t.start()
-    sdp_transfer.process()
-    t.join()
+    process_until_interrupted(sdp_transfer)
 
     cast(MagicMock, api_client.reindex_dataproducts).assert_called_once()
 
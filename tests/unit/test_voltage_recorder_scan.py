@@ -7,28 +7,28 @@
 
 """This module contains the pytest tests for the scans."""
 
+import os
 import pathlib
 import subprocess
-from typing import Any, List
+import time
+from typing import Any, Dict, List, Tuple
 from unittest.mock import MagicMock
 
 import pytest
 
 from ska_pst_send import VoltageRecorderFile, VoltageRecorderScan
-from tests.conftest import create_voltage_recorder_scan, remove_send_tempdir
+from ska_pst_send.voltage_recorder_scan import NANOSECONDS_PER_SEC
+from tests.conftest import create_scan_files, create_voltage_recorder_scan
 
 
 def test_constructor(local_product_path: pathlib.Path, scan_path: pathlib.Path) -> None:
     """Test the VoltageRecorderScan constructor."""
-    try:
-        scan = create_voltage_recorder_scan(local_product_path, scan_path)
-        assert scan.scan_config_file_exists() is False
-        assert scan.is_recording()
-        assert scan.data_product_file_exists() is False
-        assert scan.is_complete() is False
-        assert len(scan.get_all_files()) == 0
-    finally:
-        remove_send_tempdir()
+    scan = create_voltage_recorder_scan(local_product_path, scan_path)
+    assert scan.scan_config_file_exists() is False
+    assert scan.is_recording()
+    assert scan.data_product_file_exists() is False
+    assert scan.is_complete() is False
+    assert len(scan.get_all_files()) == 0
 
 
 def test_update_files(voltage_recording_scan: VoltageRecorderScan, scan_files: List[str]) -> None:
@@ -36,7 +36,9 @@ def test_update_files(voltage_recording_scan: VoltageRecorderScan, scan_files: L
     scan = voltage_recording_scan
 
     # check the file count matches the expected: scan_files + scan_config
-    assert len(scan.get_all_files()) == len(scan_files) + 1
+    all_files = scan.get_all_files()
+    assert len(all_files) == len(scan_files) + 1
+    assert tuple(scan.iter_all_files()) == all_files
 
     # manually create the ska-data-product.yaml file
     scan._data_product_file.touch()
@@ -56,69 +58,181 @@ def test_update_files(voltage_recording_scan: VoltageRecorderScan, scan_files: L
     assert len(scan.get_all_files()) == len(scan_files) + 2
 
 
+def test_update_files_reuses_unchanged_directory_listing(
+    voltage_recording_scan: VoltageRecorderScan, data_files: List[str]
+) -> None:
+    """Test that update_files only re-reads directories that have been modified."""
+    scan = voltage_recording_scan
+
+    data_dir = scan.full_scan_path / "data"
+
+    # backdate the directory so that its modification time is trusted
+    old_time_ns = time.time_ns() - int(60 * NANOSECONDS_PER_SEC)
+    for directory in [data_dir, scan.full_scan_path / "weights"]:
+        os.utime(directory, ns=(old_time_ns, old_time_ns))
+
+    scan.update_files()
+    listed_data_files = scan._data_files
+    all_files = scan.get_all_files()
+    scan.update_files()
+    assert scan._data_files is listed_data_files
+    assert scan.get_all_files() is all_files
+
+    # forcing the update re-reads the directory
+    scan.update_files(force=True)
+    assert scan._data_files is not listed_data_files
+    assert scan._data_files == listed_data_files
+
+    # adding a file modifies the directory, which must then be re-read
+    (data_dir / "2023-03-15-03:41:29_0000000707788800_000004.dada").touch()
+    scan.update_files()
+    assert len(scan._data_files) == len(data_files) + 1
+    assert len(scan.get_all_files()) == len(all_files) + 1
+
+
+def test_process_file_invalidates_stat_directory_listing(
+    voltage_recording_scan: VoltageRecorderScan,
+) -> None:
+    """Test that process_file forces the stat directory, and only that directory, to be re-read."""
+    scan = voltage_recording_scan
+    (scan.full_scan_path / "stat").mkdir()
+
+    # backdate the directories so that their modification times are trusted
+    old_time_ns = time.time_ns() - int(60 * NANOSECONDS_PER_SEC)
+    for name in ["data", "weights", "stat"]:
+        os.utime(scan.full_scan_path / name, ns=(old_time_ns, old_time_ns))
+
+    unprocessed_file = scan.next_unprocessed_file(minimum_age=0)
+    assert unprocessed_file is not None
+    assert {"data", "weights", "stat"} <= scan._dir_mtimes.keys()
+
+    assert scan.process_file(unprocessed_file)
+    assert "stat" not in scan._dir_mtimes
+    assert {"data", "weights"} <= scan._dir_mtimes.keys()
+
+
+# each of the four data files of the scan_files fixture is processed in turn
+@pytest.mark.parametrize("processed_count", range(4))
 def test_next_unprocessed_file(
     voltage_recording_scan: VoltageRecorderScan,
     data_files: List[str],
     weights_files: List[str],
     stats_files: List[str],
+    processed_count: int,
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
-    """Test the next_unprocessed_file property of VoltageRecorderScan."""
-    mocked_command = MagicMock()
-    monkeypatch.setattr(subprocess, "run", mocked_command)
+    """Test the next_unprocessed_file method of VoltageRecorderScan, after some files have been processed."""
+    scan = voltage_recording_scan
+    full_scan_path = scan.full_scan_path
+    data_product_path = scan.data_product_path
+
+    # the data, weights and stat files expected to be processed, in order
+    expected_triples = [
+        (
+            VoltageRecorderFile(full_scan_path / df, data_product_path),
+            VoltageRecorderFile(full_scan_path / wf, data_product_path),
+            VoltageRecorderFile(full_scan_path / sf, data_product_path),
+        )
+        for (df, wf, sf) in zip(sorted(data_files), sorted(weights_files), sorted(stats_files))
+    ]
+    expected = expected_triples[processed_count]
+
+    # the earlier data files have already been processed into stat files
+    create_scan_files(full_scan_path, sorted(stats_files)[:processed_count])
+
+    unprocessed_file = scan.next_unprocessed_file(minimum_age=0)
+    assert (
+        unprocessed_file is not None
+    ), f"Expected that there should be an unprocessed file for {expected[0]}"
+    assert scan._processed_count == processed_count
+    assert unprocessed_file[0] == expected[0]
+    assert unprocessed_file[1] == expected[1]
+
+    # the arguments of each call to subprocess.run
+    recorded_calls: List[Tuple[Tuple[Any, ...], Dict[str, Any]]] = []
+
+    def _process_side_effect(*args: Any, **kwargs: Any) -> MagicMock:
+        recorded_calls.append((args, kwargs))
+        os.close(os.open(unprocessed_file[2], os.O_CREAT | os.O_WRONLY, 0o644))
+
+        completed = MagicMock()
+        completed.returncode = 0
+
+        return completed
+
+    monkeypatch.setattr(subprocess, "run", _process_side_effect)
+
+    assert scan.process_file(unprocessed_file)
+
+    expected_cmd = [
+        "ska_pst_stat_file_proc",
+        "-d",
+        str(unprocessed_file[0].file_name),
+        "-w",
+        str(unprocessed_file[1].file_name),
+    ]
+
+    expected_kwargs = {
+        "cwd": full_scan_path,
+        "shell": False,
+        "stdin": None,
+        "stdout": subprocess.DEVNULL,
+        "stderr": subprocess.PIPE,
+    }
+    assert recorded_calls == [((expected_cmd,), expected_kwargs)]
+
+    assert unprocessed_file[2].exists()
+    assert unprocessed_file[2] == expected[2]
+
+    # the next data file, if any, is then the next unprocessed file
+    next_file = scan.next_unprocessed_file(minimum_age=0)
+    if processed_count + 1 < len(expected_triples):
+        assert next_file is not None
+        assert next_file[0] == expected_triples[processed_count + 1][0]
+    else:
+        assert next_file is None
+
+
+def test_process_file_marks_failure_as_unprocessable(
+    voltage_recording_scan: VoltageRecorderScan,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that a failed process_file marks the stat file as unprocessable."""
+    completed = MagicMock()
+    completed.returncode = 1
+    completed.stderr = b"unable to open data file"
+    monkeypatch.setattr(subprocess, "run", MagicMock(return_value=completed))
 
     scan = voltage_recording_scan
+    unprocessed_file = scan.next_unprocessed_file(minimum_age=0)
+    assert unprocessed_file is not None
 
-    sorted_data_files = sorted(data_files)
-    sorted_weights_files = sorted(weights_files)
-    sorted_stats_files = sorted(stats_files)
-
-    # process each of the four data files, noting this will only work whilst the processor is "touch"
-    for (i, df) in enumerate(data_files):
-        unprocessed_file = scan.next_unprocessed_file(minimum_age=0)
-        assert unprocessed_file is not None, f"Expected that there should be an unprocessed file for {df}"
-        expected = (
-            VoltageRecorderFile(scan.full_scan_path / sorted_data_files[i], scan.data_product_path),
-            VoltageRecorderFile(scan.full_scan_path / sorted_weights_files[i], scan.data_product_path),
-            VoltageRecorderFile(scan.full_scan_path / sorted_stats_files[i], scan.data_product_path),
-        )
-        assert unprocessed_file[0] == expected[0]
-        assert unprocessed_file[1] == expected[1]
-
-        def _process_side_effect(*args: Any, **kwargs: Any) -> MagicMock:
-            file: pathlib.Path = unprocessed_file[2].file_name
-            if file.exists():
-                file.unlink()
-            file.touch()
-
-            completed = MagicMock()
-            completed.returncode = 0
-
-            return completed
-
-        mocked_command.side_effect = _process_side_effect
-
-        assert scan.process_file(unprocessed_file)
-
-        expected_cmd = [
-            "ska_pst_stat_file_proc",
-            "-d",
-            str(unprocessed_file[0].file_name),
-            "-w",
-            str(unprocessed_file[1].file_name),
-        ]
-
-        mocked_command.assert_called_once_with(
-            expected_cmd,
-            cwd=scan.full_scan_path,
-            shell=False,
-            stdin=None,
-            capture_output=True,
-        )
+    assert not scan.process_file(unprocessed_file)
+    assert os.fspath(unprocessed_file[2]) in scan._unprocessable_files
+    assert scan.next_unprocessed_file(minimum_age=0) != unprocessed_file
+
+
+def test_process_all_unprocessed(
+    voltage_recording_scan: VoltageRecorderScan,
+    stats_files: List[str],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that process_all_unprocessed processes all of the unprocessed files of VoltageRecorderScan."""
+    scan = voltage_recording_scan
+
+    def _process_side_effect(command: List[str], *args: Any, **kwargs: Any) -> MagicMock:
+        # the stat file is named after the data file given by the -d argument
+        data_file = pathlib.Path(command[command.index("-d") + 1])
+        (scan.full_scan_path / "stat" / f"{data_file.stem}.h5").touch()
+
+        completed = MagicMock()
+        completed.returncode = 0
+        return completed
 
-        mocked_command.reset_mock()
+    monkeypatch.setattr(subprocess, "run", _process_side_effect)
 
-        assert unprocessed_file[2].exists()
-        assert unprocessed_file[2] == expected[2]
+    assert scan.process_all_unprocessed(minimum_age=0, max_workers=2)
 
+    for stat_file in stats_files:
+        assert (scan.full_scan_path / stat_file).exists()
     assert scan.next_unprocessed_file(minimum_age=0) is None